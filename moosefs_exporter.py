@@ -15,76 +15,231 @@ Usage:
 """
 
 import subprocess
-import time
+import sys
 import re
+import time
 import logging
 import argparse
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 import prometheus_client
-from prometheus_client import Gauge, start_http_server
-from typing import Optional, Tuple
+from prometheus_client import REGISTRY, CollectorRegistry
+from prometheus_client.exposition import choose_encoder, gzip_accepted
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from typing import Dict, Iterable, List, Optional, Tuple
 
-class MooseFSExporter:
-    def __init__(self, host: str = '100.66.36.111', timeout: int = 10):
-        """
-        Initialize MooseFS Prometheus Exporter
-        
-        :param host: MooseFS master host
-        :param timeout: Command execution timeout in seconds
-        """
-        self.host = host
-        self.timeout = timeout
-        
-        # System Metrics
-        self.mfs_version = Gauge('moosefs_master_version', 'MooseFS master version')
-        self.mfs_ram_used = Gauge('moosefs_ram_used_bytes', 'RAM used by master')
-        self.mfs_cpu_total = Gauge('moosefs_cpu_usage_percent', 'Total CPU usage')
-        self.mfs_cpu_system = Gauge('moosefs_cpu_system_percent', 'System CPU usage')
-        self.mfs_cpu_user = Gauge('moosefs_cpu_user_percent', 'User CPU usage')
-        
-        # Space Metrics
-        self.mfs_total_space = Gauge('moosefs_total_space_bytes', 'Total storage space')
-        self.mfs_free_space = Gauge('moosefs_free_space_bytes', 'Free storage space')
-        self.mfs_trash_space = Gauge('moosefs_trash_space_bytes', 'Trash space used')
-        
-        # Object Metrics
-        self.mfs_total_objects = Gauge('moosefs_total_objects', 'Total filesystem objects')
-        self.mfs_directories = Gauge('moosefs_directories', 'Number of directories')
-        self.mfs_files = Gauge('moosefs_files', 'Number of files')
-        self.mfs_chunks = Gauge('moosefs_chunks', 'Number of chunks')
-        
-        # Chunkserver Metrics
-        self.mfs_chunkserver_chunks = Gauge(
+# Consecutive mfscli failures tolerated before backing off, and the
+# backoff cap in seconds
+_MAX_FAILURES = 3
+_MAX_BACKOFF = 300
+
+# Binary unit multipliers
+_MIB = 1 << 20
+_GIB = 1 << 30
+_TIB = 1 << 40
+
+def _is_dotted(token: bytes, fields: int) -> bool:
+    """
+    Check that a token is made of dot separated digit groups, such as an
+    IPv4 address (4 fields) or a MooseFS version (3 fields)
+    
+    :param token: Token to check
+    :param fields: Expected number of digit groups
+    :return: Whether the token has that shape
+    """
+    groups = token.split(b'.')
+    return len(groups) == fields and all(group.isdigit() for group in groups)
+
+def _unit_value_at(tokens: List[bytes], i: int, unit: bytes) -> Tuple[Optional[bytes], int]:
+    """
+    Read a number tagged with a unit starting at a given token
+    
+    :param tokens: Whitespace separated tokens of a line
+    :param i: Index of the token holding the number
+    :param unit: Unit suffix, either detached (b'1.5 GiB/s') or attached (b'1.5GiB/s')
+    :return: Numeric token or None, and the index of the token after the unit
+    """
+    if i >= len(tokens):
+        return None, i
+    token = tokens[i]
+    if len(token) > len(unit) and token.endswith(unit):
+        return token[:-len(unit)], i + 1
+    if i + 1 < len(tokens) and tokens[i + 1] == unit and token != unit:
+        return token, i + 2
+    return None, i
+
+# Byte multipliers of the units mfscli picks automatically for sizes
+_UNIT_BYTES = {
+    b'B': 1,
+    b'KiB': 1 << 10, b'MiB': _MIB, b'GiB': _GIB, b'TiB': _TIB,
+    b'PiB': 1 << 50, b'EiB': 1 << 60,
+    b'KB': 10 ** 3, b'MB': 10 ** 6, b'GB': 10 ** 9, b'TB': 10 ** 12,
+    b'PB': 10 ** 15, b'EB': 10 ** 18
+}
+
+def _to_bytes(value: bytes, unit: Optional[bytes]) -> float:
+    if unit not in _UNIT_BYTES:
+        raise ValueError(f"missing or unknown size unit: {unit!r}")
+    return float(value) * _UNIT_BYTES[unit]
+
+def _to_int(value: bytes, unit: Optional[bytes]) -> int:
+    if unit is not None:
+        raise ValueError(f"unexpected unit: {unit!r}")
+    return int(value)
+
+def _to_float(value: bytes, unit: Optional[bytes]) -> float:
+    if unit is not None:
+        raise ValueError(f"unexpected unit: {unit!r}")
+    return float(value)
+
+# System metrics keyed by the literal label left of ':' in mfscli -SIG
+# output: label -> (converter, metric name, documentation)
+_SYSTEM_METRICS = {
+    b'master version': (_to_float, 'moosefs_master_version', 'MooseFS master version'),
+    b'RAM used': (_to_bytes, 'moosefs_ram_used_bytes', 'RAM used by master'),
+    b'CPU used': (_to_float, 'moosefs_cpu_usage_percent', 'Total CPU usage'),
+    b'CPU used (system)': (_to_float, 'moosefs_cpu_system_percent', 'System CPU usage'),
+    b'CPU used (user)': (_to_float, 'moosefs_cpu_user_percent', 'User CPU usage'),
+    b'total space': (_to_bytes, 'moosefs_total_space_bytes', 'Total storage space'),
+    b'free space': (_to_bytes, 'moosefs_free_space_bytes', 'Free storage space'),
+    b'trash space': (_to_bytes, 'moosefs_trash_space_bytes', 'Trash space used'),
+    b'all fs objects': (_to_int, 'moosefs_total_objects', 'Total filesystem objects'),
+    b'directories': (_to_int, 'moosefs_directories', 'Number of directories'),
+    b'files': (_to_int, 'moosefs_files', 'Number of files'),
+    b'chunks': (_to_int, 'moosefs_chunks', 'Number of chunks')
+}
+
+# One alternation over every system metric label, so the output is scanned
+# in a single regex pass; longer labels are tried first so 'CPU used' does
+# not shadow 'CPU used (system)'
+_SYSTEM_RE = re.compile(
+    rb'^[ \t]*(?P<label>'
+    + b'|'.join(re.escape(label) for label in sorted(_SYSTEM_METRICS, key=len, reverse=True))
+    + rb')[ \t]*:[ \t]*(?P<value>[0-9][0-9.]*)'
+    + rb'(?:[ \t]*(?P<unit>(?:[KMGTPE]i?)?B)\b)?',
+    re.MULTILINE
+)
+
+def _chunkserver_families() -> List[GaugeMetricFamily]:
+    """
+    Build empty chunkserver metric families
+    
+    :return: Chunks, disk used, disk total and disk usage families
+    """
+    labels = ['ip', 'server_id']
+    return [
+        GaugeMetricFamily(
             'moosefs_chunkserver_chunks', 
             'Number of chunks per chunkserver', 
-            ['ip', 'server_id']
-        )
-        self.mfs_chunkserver_disk_used = Gauge(
+            labels=labels
+        ),
+        GaugeMetricFamily(
             'moosefs_chunkserver_disk_used_bytes', 
             'Used disk space per chunkserver', 
-            ['ip', 'server_id']
-        )
-        self.mfs_chunkserver_disk_total = Gauge(
+            labels=labels
+        ),
+        GaugeMetricFamily(
             'moosefs_chunkserver_disk_total_bytes', 
             'Total disk space per chunkserver', 
-            ['ip', 'server_id']
-        )
-        self.mfs_chunkserver_disk_usage_percent = Gauge(
+            labels=labels
+        ),
+        GaugeMetricFamily(
             'moosefs_chunkserver_disk_usage_percent', 
             'Disk usage percentage per chunkserver', 
-            ['ip', 'server_id']
+            labels=labels
         )
-        
-        # I/O Metrics
-        self.mfs_chunkserver_read_speed = Gauge(
+    ]
+
+def _io_families() -> List[GaugeMetricFamily]:
+    """
+    Build empty I/O metric families
+    
+    :return: Read speed and write speed families
+    """
+    return [
+        GaugeMetricFamily(
             'moosefs_chunkserver_read_speed_bytes_per_second', 
             'Read speed per chunkserver', 
-            ['ip']
-        )
-        self.mfs_chunkserver_write_speed = Gauge(
+            labels=['ip']
+        ),
+        GaugeMetricFamily(
             'moosefs_chunkserver_write_speed_bytes_per_second', 
             'Write speed per chunkserver', 
-            ['ip']
+            labels=['ip']
         )
+    ]
+
+# OpenMetrics payloads end with this marker, which may only appear once
+_OPENMETRICS_EOF = b'# EOF\n'
+
+def _join_expositions(first: bytes, second: bytes) -> bytes:
+    """
+    Concatenate two expositions of the same format
+    
+    :param first: Payload whose OpenMetrics EOF marker, if any, is dropped
+    :param second: Payload appended as is
+    :return: Combined payload
+    """
+    if first.endswith(_OPENMETRICS_EOF):
+        first = first[:-len(_OPENMETRICS_EOF)]
+    return first + second
+
+class _CollectedFamilies:
+    """
+    Registry-like wrapper letting the exposition encoders serialize metric
+    families that were already collected
+    """
+
+    def __init__(self, families: List[GaugeMetricFamily]):
+        self._families = families
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        return self._families
+
+class MooseFSCollector(Collector):
+    def __init__(self, host: str = '100.66.36.111', timeout: int = 10, interval: int = 15):
+        """
+        Initialize MooseFS Prometheus Collector
+        
+        Metrics are collected from mfscli when Prometheus scrapes the
+        exporter, with command output reused for half the interval so
+        concurrent or closely spaced scrapes share a single collection.
+        
+        :param host: MooseFS master host
+        :param timeout: Command execution timeout in seconds
+        :param interval: Minimum metrics collection interval in seconds
+        """
+        self.host = host
+        self.timeout = timeout
+        self.interval = interval
+        
+        # Command output cache: command arguments -> (timestamp, stdout)
+        self._cache: Dict[Tuple[str, ...], Tuple[float, bytes]] = {}
+        self._cache_ttl = max(1, interval // 2)
+        
+        # Serialized MooseFS metrics: content type -> (families, payload)
+        self._expositions: Dict[str, Tuple[List[GaugeMetricFamily], bytes]] = {}
+        
+        # Interned label values keyed by their raw bytes, for the current
+        # and the previous collection
+        self._labels: Dict[Tuple[bytes, ...], List[str]] = {}
+        self._previous_labels: Dict[Tuple[bytes, ...], List[str]] = {}
+        
+        # Hash of the last parsed output and the families built from it
+        self._last_parsed: Tuple[Optional[int], List[GaugeMetricFamily]] = (None, [])
+        
+        # Consecutive failures per command and when to retry it again
+        self._failures: Dict[Tuple[str, ...], int] = {}
+        self._retry_at: Dict[Tuple[str, ...], float] = {}
+        
+        # Scrapes are served from concurrent threads; serialize mfscli runs
+        # so only the first scrape after the TTL spawns a process, and
+        # serialize parsing, which updates the label cache
+        self._lock = threading.Lock()
+        self._parse_lock = threading.Lock()
         
         # Logging
         logging.basicConfig(
@@ -92,163 +247,385 @@ class MooseFSExporter:
             format='%(asctime)s - %(levelname)s: %(message)s'
         )
         self.logger = logging.getLogger(__name__)
+        
+        # The collector lives in its own registry so its serialized output
+        # can be cached apart from the default process and platform metrics
+        self.registry = CollectorRegistry(auto_describe=True)
+        self.registry.register(self)
 
-    def _execute_command(self, command: str) -> Optional[str]:
+    def _execute_command(self, args: List[str]) -> Optional[bytes]:
         """
-        Execute MooseFS CLI command with timeout
+        Execute MooseFS CLI command with timeout, reusing output
+        younger than the cache TTL
         
-        :param command: Command to execute
+        :param args: Command and its arguments, run without a shell
         :return: Command output or None
         """
-        try:
-            result = subprocess.run(
-                command, 
-                shell=True, 
-                capture_output=True, 
-                text=True, 
-                timeout=self.timeout
-            )
-            return result.stdout if result.returncode == 0 else None
-        except subprocess.TimeoutExpired:
-            self.logger.error(f"Command timed out: {command}")
-        except Exception as e:
-            self.logger.error(f"Command execution error: {e}")
-        return None
+        command = tuple(args)
+        
+        # Fast path without the lock: cache entries are immutable tuples that
+        # are replaced in a single dict assignment, so a fresh entry can be
+        # read safely while another scrape thread refreshes it
+        cached = self._cache.get(command)
+        if cached and (time.monotonic() - cached[0]) < self._cache_ttl:
+            return cached[1]
+
+        with self._lock:
+            # Another scrape may have refreshed the entry while we waited
+            now = time.monotonic()
+            cached = self._cache.get(command)
+            if cached and (now - cached[0]) < self._cache_ttl:
+                return cached[1]
+
+            # Skip the command entirely while it is backing off after
+            # repeated failures
+            if now < self._retry_at.get(command, 0.0):
+                return None
+
+            output = None
+            try:
+                result = subprocess.run(
+                    args, 
+                    capture_output=True, 
+                    timeout=self.timeout
+                )
+                if result.returncode == 0:
+                    output = result.stdout
+            except subprocess.TimeoutExpired:
+                self.logger.error(f"Command timed out: {' '.join(args)}")
+            except Exception as e:
+                self.logger.error(f"Command execution error: {e}")
+
+            if output is None:
+                failures = self._failures.get(command, 0) + 1
+                self._failures[command] = failures
+                if failures > _MAX_FAILURES:
+                    delay = min(self.interval * 2 ** (failures - _MAX_FAILURES), _MAX_BACKOFF)
+                    self._retry_at[command] = now + delay
+                    self.logger.warning(
+                        f"Command failed {failures} times in a row, retrying in {delay}s: {' '.join(args)}"
+                    )
+                return None
+
+            self._failures.pop(command, None)
+            self._retry_at.pop(command, None)
+            # mfscli output is ASCII, so it is parsed as bytes without decoding
+            self._cache[command] = (now, output)
+            return output
+
+    def _label_values(self, *raw: bytes) -> List[str]:
+        """
+        Decode label values, reusing the interned strings of the previous
+        collection since the set of chunkservers rarely changes
+        
+        :param raw: Raw label values from mfscli output
+        :return: Label values
+        """
+        label_values = self._labels.get(raw)
+        if label_values is None:
+            label_values = self._previous_labels.get(raw)
+            if label_values is None:
+                label_values = [sys.intern(value.decode()) for value in raw]
+            self._labels[raw] = label_values
+        return label_values
 
-    def collect_system_metrics(self) -> bool:
+    def _parse_system(self, output: Optional[bytes]) -> List[GaugeMetricFamily]:
         """
-        Collect global MooseFS system metrics
+        Parse global MooseFS system metrics
         
-        :return: Success status
+        :param output: Output of mfscli, parsed for its -SIG section
+        :return: Metric families found in the output
         """
+        families = []
         try:
-            output = self._execute_command(f'mfscli -H {self.host} -SIG')
             if not output:
-                return False
-
-            metrics_map = {
-                'version': (r'master version\s+:\s+(\S+)', float, self.mfs_version),
-                'ram_used': (r'RAM used\s+:\s+(\d+)\s*MiB', lambda x: int(x) * 1024 * 1024, self.mfs_ram_used),
-                'cpu_total': (r'CPU used\s+:\s+(\d+\.\d+)%', float, self.mfs_cpu_total),
-                'cpu_system': (r'CPU used \(system\)\s+:\s+(\d+\.\d+)%', float, self.mfs_cpu_system),
-                'cpu_user': (r'CPU used \(user\)\s+:\s+(\d+\.\d+)%', float, self.mfs_cpu_user),
-                'total_space': (r'total space\s+:\s+(\d+\.\d+)\s*TiB', lambda x: float(x) * 1024 * 1024 * 1024 * 1024, self.mfs_total_space),
-                'free_space': (r'free space\s+:\s+(\d+\.\d+)\s*TiB', lambda x: float(x) * 1024 * 1024 * 1024 * 1024, self.mfs_free_space),
-                'trash_space': (r'trash space\s+:\s+(\d+)\s*MiB', lambda x: int(x) * 1024 * 1024, self.mfs_trash_space),
-                'total_objects': (r'all fs objects\s+:\s+(\d+)', int, self.mfs_total_objects),
-                'directories': (r'directories\s+:\s+(\d+)', int, self.mfs_directories),
-                'files': (r'files\s+:\s+(\d+)', int, self.mfs_files),
-                'chunks': (r'chunks\s+:\s+(\d+)', int, self.mfs_chunks)
-            }
-
-            for metric_name, (pattern, converter, gauge) in metrics_map.items():
-                match = re.search(pattern, output)
-                if match:
-                    try:
-                        value = converter(match.group(1))
-                        gauge.set(value)
-                    except Exception as e:
-                        self.logger.warning(f"Error processing {metric_name}: {e}")
-
-            return True
+                return families
+
+            seen = set()
+            for match in _SYSTEM_RE.finditer(output):
+                key = match.group('label')
+                if key in seen:
+                    continue
+                seen.add(key)
+                converter, name, documentation = _SYSTEM_METRICS[key]
+                try:
+                    families.append(GaugeMetricFamily(
+                        name, documentation,
+                        value=converter(match.group('value'), match.group('unit'))
+                    ))
+                except Exception as e:
+                    self.logger.warning(f"Error processing {key.decode()}: {e}")
         except Exception as e:
             self.logger.error(f"System metrics collection error: {e}")
-            return False
+        return families
 
-    def collect_chunkserver_metrics(self) -> bool:
+    def _parse_cs(self, output: Optional[bytes]) -> List[GaugeMetricFamily]:
         """
-        Collect MooseFS chunkserver metrics
+        Parse MooseFS chunkserver metrics
         
-        :return: Success status
+        :param output: Output of mfscli, parsed for its -SCS section
+        :return: Chunkserver metric families
         """
+        families = _chunkserver_families()
+        chunks_family, disk_used_family, disk_total_family, disk_usage_family = families
+
         try:
-            output = self._execute_command(f'mfscli -H {self.host} -SCS')
             if not output:
-                return False
-
-            chunkserver_pattern = r'(\d+\.\d+\.\d+\.\d+)\s+\d+\s+(\d+)\s+[-]\s+\d+\.\d+\.\d+\s+\d+\s+\w+\s+\w+\s+(\d+)\s+(\d+\.\d+)\s*GiB\s+(\d+)\s*GiB\s+(\d+\.\d+)%'
-            chunkserver_lines = re.findall(chunkserver_pattern, output)
+                return []
 
-            for line in chunkserver_lines:
-                ip, server_id, chunks, used, total, used_percent = line
+            for line in output.splitlines():
+                # ip port id - version ... chunks used GiB total GiB percent%
+                if b'GiB' not in line:
+                    continue
+                parts = line.split()
+                if (len(parts) < 9 or not _is_dotted(parts[0], 4)
+                        or not parts[1].isdigit() or not parts[2].isdigit()
+                        or parts[3] != b'-' or not _is_dotted(parts[4], 3)):
+                    continue
                 
-                # Convert values
-                chunks = int(chunks)
-                used_bytes = float(used) * 1024 * 1024 * 1024
-                total_bytes = int(total) * 1024 * 1024 * 1024
-                used_percent = float(used_percent)
-
-                # Update chunkserver metrics
-                labels = {'ip': ip, 'server_id': server_id}
-                self.mfs_chunkserver_chunks.labels(**labels).set(chunks)
-                self.mfs_chunkserver_disk_used.labels(**labels).set(used_bytes)
-                self.mfs_chunkserver_disk_total.labels(**labels).set(total_bytes)
-                self.mfs_chunkserver_disk_usage_percent.labels(**labels).set(used_percent)
-
-            return True
+                # used, total and percent are the columns right after chunks
+                used, end = _unit_value_at(parts, 9, b'GiB')
+                total, end = _unit_value_at(parts, end, b'GiB')
+                used_percent, _ = _unit_value_at(parts, end, b'%')
+                if used is None or total is None or used_percent is None:
+                    continue
+
+                # Convert values, skipping only rows with malformed fields
+                try:
+                    chunks = int(parts[8])
+                    used_bytes = float(used) * _GIB
+                    total_bytes = int(total) * _GIB
+                    used_percent = float(used_percent)
+                except ValueError:
+                    continue
+
+                # Add chunkserver samples
+                label_values = self._label_values(parts[0], parts[2])
+                chunks_family.add_metric(label_values, chunks)
+                disk_used_family.add_metric(label_values, used_bytes)
+                disk_total_family.add_metric(label_values, total_bytes)
+                disk_usage_family.add_metric(label_values, used_percent)
+
+            return families
         except Exception as e:
             self.logger.error(f"Chunkserver metrics collection error: {e}")
-            return False
+            return []
 
-    def collect_io_metrics(self) -> bool:
+    def _parse_io(self, output: Optional[bytes]) -> List[GaugeMetricFamily]:
         """
-        Collect MooseFS I/O metrics
+        Parse MooseFS I/O metrics
         
-        :return: Success status
+        :param output: Output of mfscli, parsed for its -SHD section
+        :return: I/O metric families
         """
+        families = _io_families()
+        read_speed_family, write_speed_family = families
+
         try:
-            output = self._execute_command(f'mfscli -H {self.host} -SHD')
             if not output:
-                return False
+                return []
 
-            io_pattern = r'(\d+\.\d+\.\d+\.\d+):\d+:.* (\d+\.\d+)\s*GiB/s\s+(\d+\.\d+)\s*MiB/s'
-            io_lines = re.findall(io_pattern, output)
-
-            for line in io_lines:
-                ip, read_speed_gib, write_speed_mib = line
+            for line in output.splitlines():
+                # ip:port:path ... read GiB/s write MiB/s
+                if b'GiB/s' not in line or b'MiB/s' not in line:
+                    continue
+                head, sep, rest = line.partition(b':')
+                ip = head.strip()
+                if not sep or not _is_dotted(ip, 4):
+                    continue
+                
+                # Skip the port:path token, speeds follow in the remaining columns
+                tokens = rest.split()[1:]
+                # Use the last GiB/s value directly followed by a MiB/s value
+                speeds = None
+                for i in range(len(tokens)):
+                    read_speed_gib, end = _unit_value_at(tokens, i, b'GiB/s')
+                    if read_speed_gib is None:
+                        continue
+                    write_speed_mib, _ = _unit_value_at(tokens, end, b'MiB/s')
+                    if write_speed_mib is not None:
+                        speeds = (read_speed_gib, write_speed_mib)
+                if speeds is None:
+                    continue
                 
-                # Convert speeds to bytes/second
-                read_speed_bytes = float(read_speed_gib) * 1024 * 1024 * 1024
-                write_speed_bytes = float(write_speed_mib) * 1024 * 1024
+                # Convert speeds to bytes/second, skipping malformed rows
+                try:
+                    read_speed_bytes = float(speeds[0]) * _GIB
+                    write_speed_bytes = float(speeds[1]) * _MIB
+                except ValueError:
+                    continue
                 
-                # Update I/O metrics
-                self.mfs_chunkserver_read_speed.labels(ip=ip).set(read_speed_bytes)
-                self.mfs_chunkserver_write_speed.labels(ip=ip).set(write_speed_bytes)
+                # Add I/O samples
+                label_values = self._label_values(ip)
+                read_speed_family.add_metric(label_values, read_speed_bytes)
+                write_speed_family.add_metric(label_values, write_speed_bytes)
 
-            return True
+            return families
         except Exception as e:
             self.logger.error(f"I/O metrics collection error: {e}")
-            return False
+            return []
 
-    def collect_all_metrics(self) -> None:
+    def describe(self) -> Iterable[GaugeMetricFamily]:
         """
-        Collect all MooseFS metrics
+        Describe the collector's metrics on registration
+        
+        Returning empty families keeps the registry from calling collect(),
+        and thereby mfscli, before the HTTP server is listening, while still
+        registering the metric names for name[] filtering.
+        
+        :return: Metric families without samples
         """
-        metrics_collectors = [
-            self.collect_system_metrics,
-            self.collect_chunkserver_metrics,
-            self.collect_io_metrics
+        families = [
+            GaugeMetricFamily(name, documentation)
+            for _, name, documentation in _SYSTEM_METRICS.values()
         ]
+        return families + _chunkserver_families() + _io_families()
 
-        for collector in metrics_collectors:
-            try:
-                collector()
-            except Exception as e:
-                self.logger.error(f"Metrics collection failed: {collector.__name__} - {e}")
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        """
+        Collect all MooseFS metrics, called by the registry on every scrape
+        
+        :return: Metric families
+        """
+        families = []
+
+        # mfscli prints several data sets in one invocation, and each
+        # parser only picks the lines of its own section, so a single
+        # process serves every parser
+        output = self._execute_command(
+            ['mfscli', '-H', self.host, '-SIG', '-SCS', '-SHD']
+        )
+
+        # Byte-identical output parses to the same families, so reuse them
+        output_hash = hash(output) if output else None
+        last_hash, last_families = self._last_parsed
+        if output_hash is not None and output_hash == last_hash:
+            return last_families
+
+        # Parsing swaps and fills the label cache, so concurrent scrapes
+        # parse one at a time; a scrape that waited reuses the result of
+        # the one before it when the output is the same
+        with self._parse_lock:
+            last_hash, last_families = self._last_parsed
+            if output_hash is not None and output_hash == last_hash:
+                return last_families
+
+            # Only keep label values of chunkservers still reported
+            self._previous_labels, self._labels = self._labels, {}
+
+            for parser in (self._parse_system, self._parse_cs, self._parse_io):
+                try:
+                    families.extend(parser(output))
+                except Exception as e:
+                    self.logger.error(f"Metrics collection failed: {parser.__name__} - {e}")
+
+            if output_hash is not None:
+                self._last_parsed = (output_hash, families)
+        return families
 
-    def run(self, port: int = 9841, interval: int = 15) -> None:
+    def exposition(self, accept: Optional[str] = None) -> Tuple[bytes, str]:
+        """
+        Serialize the default registry and the MooseFS metrics in the format
+        negotiated from the Accept header
+        
+        The MooseFS part is reused for as long as collect() returns the same
+        families, i.e. until a collection parses new mfscli output, while
+        the process and platform collectors are serialized on every scrape.
+        
+        :param accept: Accept header of the scrape request
+        :return: Exposition payload and its content type
+        """
+        encoder, content_type = choose_encoder(accept)
+        families = self.collect()
+        cached = self._expositions.get(content_type)
+        if cached and cached[0] is families:
+            moosefs_payload = cached[1]
+        else:
+            moosefs_payload = encoder(_CollectedFamilies(families))
+            self._expositions[content_type] = (families, moosefs_payload)
+        return _join_expositions(encoder(REGISTRY), moosefs_payload), content_type
+
+    def filtered_exposition(self, accept: Optional[str], names: List[str]) -> Tuple[bytes, str]:
+        """
+        Serialize only the requested metric names, without caching
+        
+        :param accept: Accept header of the scrape request
+        :param names: Metric names from the name[] query parameter
+        :return: Exposition payload and its content type
+        """
+        encoder, content_type = choose_encoder(accept)
+        payload = _join_expositions(
+            encoder(REGISTRY.restricted_registry(names)),
+            encoder(self.registry.restricted_registry(names))
+        )
+        return payload, content_type
+
+    def run(self, port: int = 9841) -> None:
         """
         Run Prometheus metrics server
         
         :param port: Metrics server port
-        :param interval: Metrics collection interval
         """
         self.logger.info(f"Starting MooseFS Prometheus Exporter on port {port}")
-        start_http_server(port)
         
-        while True:
-            self.collect_all_metrics()
-            time.sleep(interval)
+        # Metrics are collected on scrape by the server threads
+        handler = type('MooseFSMetricsHandler', (MetricsHandler,), {'collector': self})
+        server = ThreadingHTTPServer(('', port), handler)
+        server.daemon_threads = True
+        server.serve_forever()
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """
+    HTTP handler serving the cached exposition payloads of a collector,
+    set as the collector class attribute of a subclass
+    
+    Mirrors the prometheus_client handler: Accept negotiation, gzip,
+    name[] filtering, OPTIONS and an empty favicon.
+    """
+
+    collector: 'MooseFSCollector'
+
+    def _respond(self, status: int, headers: List[Tuple[str, str]], payload: bytes) -> None:
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path == '/favicon.ico':
+            self._respond(200, [], b'')
+            return
+
+        accept = self.headers.get('Accept')
+        compress = gzip_accepted(self.headers.get('Accept-Encoding'))
+        params = parse_qs(url.query)
+        if 'name[]' in params:
+            payload, content_type = self.collector.filtered_exposition(accept, params['name[]'])
+        else:
+            payload, content_type = self.collector.exposition(accept)
+        if compress:
+            payload = gzip.compress(payload)
+
+        headers = [('Content-Type', content_type)]
+        if compress:
+            headers.append(('Content-Encoding', 'gzip'))
+        self._respond(200, headers, payload)
+
+    def do_OPTIONS(self) -> None:
+        self._respond(200, [('Allow', 'OPTIONS,GET')], b'')
+
+    def _method_not_allowed(self) -> None:
+        payload = f"# HTTP 405 Method Not Allowed: {self.command}; use OPTIONS or GET\n".encode()
+        self._respond(405, [('Allow', 'OPTIONS,GET')], payload)
+
+    do_HEAD = do_POST = do_PUT = do_DELETE = do_PATCH = _method_not_allowed
+
+    def log_message(self, format: str, *args) -> None:
+        # Scrapes are too frequent to log each request
+        pass
 
 def parse_arguments():
     """
@@ -272,7 +649,7 @@ def parse_arguments():
         '-i', '--interval', 
         type=int, 
         default=15, 
-        help='Metrics collection interval'
+        help='Minimum interval between mfscli collections'
     )
     return parser.parse_args()
 
@@ -282,8 +659,8 @@ def main():
     """
     args = parse_arguments()
     
-    exporter = MooseFSExporter(host=args.host)
-    exporter.run(port=args.port, interval=args.interval)
+    collector = MooseFSCollector(host=args.host, interval=args.interval)
+    collector.run(port=args.port)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,149 @@
+"""
+Parser tests for the MooseFS Prometheus Exporter
+
+Run: python3 -m pytest test_moosefs_exporter.py
+"""
+
+import pytest
+
+from moosefs_exporter import MooseFSCollector
+
+SYSTEM_OUTPUT = b"""master version : 4.56
+RAM used : 512 MiB
+CPU used : 3.25%
+CPU used (system) : 1.50%
+CPU used (user) : 1.75%
+total space : 10.50 TiB
+free space : 4.25 TiB
+trash space : 128 MiB
+all fs objects : 10000
+directories : 1000
+files : 8000
+chunks : 20000
+"""
+
+
+@pytest.fixture
+def collector():
+    return MooseFSCollector(host='localhost')
+
+
+def samples(families):
+    """
+    Flatten metric families into a name -> value mapping of unlabelled samples
+    """
+    return {family.name: family.samples[0].value for family in families}
+
+
+def test_system_metrics(collector):
+    values = samples(collector._parse_system(SYSTEM_OUTPUT))
+    assert values == {
+        'moosefs_master_version': 4.56,
+        'moosefs_ram_used_bytes': 512 * 2 ** 20,
+        'moosefs_cpu_usage_percent': 3.25,
+        'moosefs_cpu_system_percent': 1.5,
+        'moosefs_cpu_user_percent': 1.75,
+        'moosefs_total_space_bytes': 10.5 * 2 ** 40,
+        'moosefs_free_space_bytes': 4.25 * 2 ** 40,
+        'moosefs_trash_space_bytes': 128 * 2 ** 20,
+        'moosefs_total_objects': 10000,
+        'moosefs_directories': 1000,
+        'moosefs_files': 8000,
+        'moosefs_chunks': 20000,
+    }
+
+
+def test_system_metrics_convert_non_default_units(collector):
+    output = (
+        b" total space : 500.00 GiB\n"
+        b"RAM used : 1.5 GiB\n"
+        b"trash space : 64 KiB\n"
+    )
+    values = samples(collector._parse_system(output))
+    assert values == {
+        'moosefs_total_space_bytes': 500 * 2 ** 30,
+        'moosefs_ram_used_bytes': 1.5 * 2 ** 30,
+        'moosefs_trash_space_bytes': 64 * 2 ** 10,
+    }
+
+
+def test_system_metrics_skip_sizes_without_unit(collector):
+    values = samples(collector._parse_system(b"total space : 500\nfiles : 12\n"))
+    assert values == {'moosefs_files': 12}
+
+
+def test_system_metrics_first_occurrence_wins(collector):
+    values = samples(collector._parse_system(b"files : 1\nfiles : 2\n"))
+    assert values == {'moosefs_files': 1}
+
+
+def labelled_samples(families):
+    """
+    Flatten metric families into a (name, label values) -> value mapping
+    """
+    return {
+        (sample.name, tuple(sample.labels.values())): sample.value
+        for family in families
+        for sample in family.samples
+    }
+
+
+def test_chunkserver_metrics(collector):
+    output = (
+        b"192.168.1.10 9422 1 - 4.56.6 0 Y N 12345 120.5 GiB 500 GiB 24.10%\n"
+        b"192.168.1.11 9422 2 - 4.56.6 0 Y N 23456 220.25GiB 1000GiB 22.03%\n"
+    )
+    values = labelled_samples(collector._parse_cs(output))
+    assert values == {
+        ('moosefs_chunkserver_chunks', ('192.168.1.10', '1')): 12345,
+        ('moosefs_chunkserver_disk_used_bytes', ('192.168.1.10', '1')): 120.5 * 2 ** 30,
+        ('moosefs_chunkserver_disk_total_bytes', ('192.168.1.10', '1')): 500 * 2 ** 30,
+        ('moosefs_chunkserver_disk_usage_percent', ('192.168.1.10', '1')): 24.1,
+        ('moosefs_chunkserver_chunks', ('192.168.1.11', '2')): 23456,
+        ('moosefs_chunkserver_disk_used_bytes', ('192.168.1.11', '2')): 220.25 * 2 ** 30,
+        ('moosefs_chunkserver_disk_total_bytes', ('192.168.1.11', '2')): 1000 * 2 ** 30,
+        ('moosefs_chunkserver_disk_usage_percent', ('192.168.1.11', '2')): 22.03,
+    }
+
+
+@pytest.mark.parametrize('line', [
+    # Space in TiB, with GiB values only in the later marked-for-removal columns
+    b"10.0.0.2 9422 2 - 3.0.117 5 ok no 1000 1.50 TiB 4 TiB 37.50% 0 0.00 GiB 0 GiB 0.00%",
+    # Used space in MiB
+    b"10.0.0.3 9422 3 - 3.0.117 5 ok no 1000 512.00 MiB 4 GiB 12.50%",
+    # Fractional total
+    b"10.0.0.4 9422 4 - 3.0.117 5 ok no 1000 1.00 GiB 1.5 GiB 50.00%",
+    # Disk line from -SHD in the shared output
+    b"10.0.0.1:9422:/mnt/hd1 5000 0 - 1.2.3 0 ok ok 77 1.00 GiB 2 GiB 50.00%",
+])
+def test_chunkserver_metrics_skip_malformed_rows(collector, line):
+    valid = b"192.168.1.10 9422 1 - 4.56.6 0 Y N 12345 120.5 GiB 500 GiB 24.10%"
+    values = labelled_samples(collector._parse_cs(line + b"\n" + valid + b"\n"))
+    assert {labels for _, labels in values} == {('192.168.1.10', '1')}
+
+
+def test_io_metrics_pair_write_with_read(collector):
+    output = (
+        b"192.168.1.10:9422:/mnt/hd1 ok 1.00 GiB/s 2.00 MiB/s 3.00 MiB/s 4.00 MiB/s\n"
+        b"192.168.1.11:9422:/mnt/hd1 ok 2.00 MiB/s 1.00 GiB/s\n"
+    )
+    values = labelled_samples(collector._parse_io(output))
+    assert values == {
+        ('moosefs_chunkserver_read_speed_bytes_per_second', ('192.168.1.10',)): 2 ** 30,
+        ('moosefs_chunkserver_write_speed_bytes_per_second', ('192.168.1.10',)): 2 * 2 ** 20,
+    }
+
+
+def test_exposition_rebuilt_when_collection_changes(collector, monkeypatch):
+    outputs = iter([b"files : 1\n", b"files : 1\n", b"files : 2\n"])
+    monkeypatch.setattr(collector, '_execute_command', lambda args: next(outputs))
+
+    first, content_type = collector.exposition()
+    cached = collector._expositions[content_type][1]
+    second, _ = collector.exposition()
+    assert collector._expositions[content_type][1] is cached
+    third, _ = collector.exposition()
+    assert collector._expositions[content_type][1] is not cached
+
+    assert b'moosefs_files 1.0' in first and b'moosefs_files 1.0' in second
+    assert b'moosefs_files 2.0' in third